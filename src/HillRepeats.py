@@ -3,234 +3,351 @@
 #
 import sys                      # for argv.sys
 import os.path                  # for checking if file exists
-from datetime import datetime   # for calculating dates
+from datetime import timedelta  # for interval durations
 import configparser as cfg      # for reading config files
+import math                     # for haversine distances
+import heapq                    # for keeping the closest starts
+from array import array         # for storing activity columns
+from dataclasses import dataclass, field    # for the Activity columns
+import logging                  # for log messages
+
+logger = logging.getLogger(__name__)
 
 date_format = "%H:%M:%S %p"
 
-# activity lines: 0:[time] 1:[lat] 2:[long] 3:[altitude(m)] 4:[distance(m)] 5:[HR(BPM)] 6:[Cadence(RPM)] 7:[Speed(m/s)]
+# activity columns: 0:[time] 1:[lat] 2:[long] 3:[altitude(m)] 4:[distance(m)] 5:[HR(BPM)] 6:[Cadence(RPM)] 7:[Speed(m/s)]
 TIME = 0; LAT = 1; LONG = 2; ALT = 3; DIST = 4; HR = 5; CAD = 6; SPEED = 7;
 
+# mean radius of the earth (m), used for haversine distances
+EARTH_RADIUS = 6371000.0
+
+# possible starts must be within this distance (m) of the hill's start position
+START_MAX_DISTANCE = 50.0
+
+
+@dataclass
+class Activity:
+    """
+    activity data stored by column instead of by line, i.e. activity.hr[i] is the heart rate of line i
+    numeric columns are arrays of floats, so scanning a column reads one contiguous block of memory
+    """
+    time: list = field(default_factory=list)                    # times as strings, e.g. "7:51:08 PM"
+    lat: array = field(default_factory=lambda: array("d"))      # latitude
+    long: array = field(default_factory=lambda: array("d"))     # longitude
+    alt: array = field(default_factory=lambda: array("d"))      # altitude(m)
+    dist: array = field(default_factory=lambda: array("d"))     # distance(m)
+    hr: array = field(default_factory=lambda: array("d"))       # HR(BPM)
+    cad: array = field(default_factory=lambda: array("d"))      # Cadence(RPM)
+    speed: array = field(default_factory=lambda: array("d"))    # Speed(m/s)
+
+    # calculated from lat/long, see __post_init__()
+    lat_rad: array = field(init=False, repr=False)              # latitude (radians)
+    long_rad: array = field(init=False, repr=False)             # longitude (radians)
+    cos_lat: array = field(init=False, repr=False)              # cosine of the latitude
+
+    def __post_init__(self):
+        # these only depend on the positions, so calculate them once instead of in every haversine_distances() call
+        self.lat_rad = array("d", map(math.radians, self.lat))
+        self.long_rad = array("d", map(math.radians, self.long))
+        self.cos_lat = array("d", map(math.cos, self.lat_rad))
+
+    def __len__(self):
+        return len(self.time)
+
+    def columns(self):
+        """
+        returns all of the columns, in the order of the UPPERCASE constants above, i.e. columns()[HR] is activity.hr
+        :return: list of columns
+        """
+        return [self.time, self.lat, self.long, self.alt, self.dist, self.hr, self.cad, self.speed]
 
 def usage():
     #print("USAGE: python HillRepeats.py <num-repeats> <activity.txt> <start-lat> <start-long> <stop-lat> <stop-long>")
     print("USAGE: python HillRepeats.py <activity.txt> <hill-name>")
     exit(-1)
 
-def calc_column_min_avg_max(split_lines, column_index, start_index, stop_index):
+def calc_column_min_avg_max(activity, column_index, start_index, stop_index):
     """
     calculates the min, average and max for the column between the start and stop indices
-    :param split_lines: list of activity lines, with the column we want
-    :param column_index: index for the column in the activity line, use the UPPERCASE constants above
-    :param start_index: the index within split_lines to start calculating
-    :param stop_index: the index within split_lines to stop calculating
+    :param activity: activity columns, with the column we want
+    :param column_index: index for the column in the activity, use the UPPERCASE constants above
+    :param start_index: the line index to start calculating
+    :param stop_index: the line index to stop calculating
     :return: min, avg, max (numeric values)
     """
 
-    # print("DEBUG:", column_index, start_index, stop_index)
+    return calc_columns_min_avg_max(activity, [column_index], start_index, stop_index)[0]
+
+def calc_columns_min_avg_max(activity, column_indices, start_index, stop_index):
+    """
+    calculates the min, average and max for several columns between the start and stop indices
+    :param activity: activity columns, with the columns we want
+    :param column_indices: indices for the columns in the activity, use the UPPERCASE constants above
+    :param start_index: the line index to start calculating
+    :param stop_index: the line index to stop calculating
+    :return: list of min, avg, max (numeric values) for every column, in the same order as column_indices
+    """
 
-    # NOTE: we +1 the stop_index b/c range goes up to, but not including, this value, and we want to include it
-    col_min = None
-    col_max = None
-    col_avg = 0
-    col_sum = 0
+    # print("DEBUG:", column_indices, start_index, stop_index)
+
+    # NOTE: we +1 the stop_index b/c slicing goes up to, but not including, this value, and we want to include it
     col_count = stop_index - start_index
 
-    for i in range(start_index, stop_index + 1):
+    # slice each column's lines directly, then let the builtins do the reductions
+    activity_columns = activity.columns()
+    columns = [activity_columns[c][start_index:stop_index + 1] for c in column_indices]
+
+    results = []
 
-        col_val = split_lines[i][column_index]
+    for col in columns:
 
         # min must be more than zero, to avoid calculating non-effort values
-        if col_val > 0:
-            if col_min is None:
-                col_min = col_val
-            elif col_val < col_min:
-                col_min = col_val
+        # None if there are no (effort) values at all
+        col_min = min((col_val for col_val in col if col_val > 0), default=None)
+        col_max = max(col, default=None)
+        col_avg = sum(col) / float(col_count)
+
+        results.append((col_min, col_avg, col_max))
+
+    return results
 
-        if col_max is None:
-            col_max = col_val
-        elif col_val > col_max:
-            col_max = col_val
+def find_closest(distances, lo, hi):
+    """
+    returns the index and distance of the closest line between two indices, the first one wins any ties
+    :param distances: distance for every activity line
+    :param lo: first index to search
+    :param hi: index to stop searching at (not included)
+    :return: index, distance - or 0, math.inf if there are no lines to search
+    """
 
-        col_sum += col_val
+    if lo >= hi:
+        return 0, math.inf
 
-    col_avg = col_sum / float(col_count)
+    # index() returns the first of any equal distances
+    closest = distances.index(min(distances[lo:hi]), lo, hi)
 
-    return col_min, col_avg, col_max
+    return closest, distances[closest]
 
-def find_starts(split_lines, start_lat, start_long):
+def find_start_candidates(activity, start_lat, start_long, max_distance):
     """
-    returns a list of starting entries with items: [<lat-long-error> <line-index> <line-data>]
-    :param split_lines: list of raw lines to search for starting positions
+    returns all stopped (zero speed) lines within a maximum distance of the start, as (distance, line index) pairs
+    :param activity: activity columns to search for starting positions
     :param start_lat: latitude value to search for starting positions
     :param start_long: longitude value to search for starting positions
-    :return: a list of starts
+    :param max_distance: only keep lines closer than this distance (m)
+    :return: list of (distance, line index), in line order
     """
 
-    # find all possible starts
-    found_starts = []
+    # only stopped lines can be starts, so only calculate distances for them
+    stopped = [i for i, speed in enumerate(activity.speed) if speed == float(0)]
+
+    lat_rad = activity.lat_rad; long_rad = activity.long_rad; cos_lat = activity.cos_lat
+    distances = haversine_distances([lat_rad[i] for i in stopped],
+                                    [long_rad[i] for i in stopped],
+                                    [cos_lat[i] for i in stopped],
+                                    start_lat, start_long)
 
-    for i in range(len(split_lines)):
+    return [(distance, i) for i, distance in zip(stopped, distances) if distance < max_distance]
 
-        lat = split_lines[i][LAT]
-        long = split_lines[i][LONG]
+def find_starts(activity, start_lat, start_long):
+    """
+    returns a list of starting entries with items: [<distance-from-start(m)> <line-index> <data-line-index>]
+    the data line is the line whose values (time, distance) describe the start, the line after the zero-speed start
+    :param activity: activity columns to search for starting positions
+    :param start_lat: latitude value to search for starting positions
+    :param start_long: longitude value to search for starting positions
+    :return: a list of starts
+    """
 
-        start_lat_diff = (lat - start_lat)
-        start_long_diff = (long - start_long)
-        start_error = abs(start_lat_diff) + abs(start_long_diff)
+    # possible starts - we always stop before we do a run, so look for zero speed (stop) close to the start
+    candidates = find_start_candidates(activity, start_lat, start_long, START_MAX_DISTANCE)
 
-        # add some possible starts - we always stop before we do a run, so look for zero speed (stop)
-        if split_lines[i][SPEED] == float(0):
-            if len(found_starts) < 20 and start_error < 0.01:
-                new_start = [start_error, i, split_lines[i]]
-                found_starts.append(new_start)
-                # print("new start:", new_start)
-            else:
-                for s in found_starts:
-                    if start_error < s[0]:
-                        # print("removing start:", s)
-                        found_starts.remove(s)
+    # keep the 20 closest possible starts
+    # heap of (-distance, line index) so the furthest (worst) start is always at the root, and is the one replaced
+    closest_starts = []
 
-                        new_start = [start_error, i, split_lines[i]]
-                        found_starts.append(new_start)
-                        # print("adding start:", new_start)
+    for start_error, i in candidates:
 
-                        break
+        if len(closest_starts) < 20:
+            heapq.heappush(closest_starts, (-start_error, i))
+        elif -start_error > closest_starts[0][0]:
+            heapq.heapreplace(closest_starts, (-start_error, i))
 
-    # remove any starts that are too close together in time, i.e. parked and moved the bike, take the last entry
-    good_starts = []
+    # find all possible starts, in line (time) order so neighbouring starts can be compared below
+    found_starts = [[-neg_error, i, i] for neg_error, i in sorted(closest_starts, key=lambda s: s[1])]
 
-    for i in range(len(found_starts) - 1):
-        time0 = datetime.strptime(found_starts[i][2][TIME], date_format)
-        time1 = datetime.strptime(found_starts[i + 1][2][TIME], date_format)
-        diff = time1 - time0
+    # remove any starts that are too close together in time, i.e. parked and moved the bike, take the last entry
+    # seconds between neighbouring starts, only the found starts' times are parsed
+    # NOTE: % wraps negative differences (past midnight) into a day, same as timedelta.seconds
+    start_seconds = [time_str_to_seconds(activity.time[s[2]]) for s in found_starts]
+    start_gaps = [(time1 - time0) % (24 * 60 * 60) for time0, time1 in zip(start_seconds, start_seconds[1:])]
 
-        # keep starts that are more than 2 minutes apart
-        if diff.seconds > 2 * 60:
-            good_starts.append(found_starts[i])
-        # else:
-        #    # previous time is too close, keep the older of the two
-        #    good_starts.append(found_starts[i+1])
+    # keep starts that are more than 2 minutes apart
+    # (zip stops at the last gap, the last entry is kept below)
+    good_starts = [s for s, gap in zip(found_starts, start_gaps) if gap > 2 * 60]
 
     # keep the last entry
     good_starts.append(found_starts[len(found_starts) - 1])
 
     # actual start is the next entry after the detected (zero-speed start)
-    better_starts = []
+    # overwrite the data line index in place, instead of building a new list of starts
     for s in good_starts:
-        gs_error = s[0]
-        gs_line = s[1]
-        gs_raw = split_lines[gs_line + 1]
-        better_starts.append([gs_error, gs_line, gs_raw])
-
-    good_starts = better_starts
+        s[2] = s[1] + 1
 
     # found starts
-    log_message("DEBUG: found good starts")
-    for s in good_starts:
-        log_message(s)
+    # NOTE: %-style arguments are only formatted if the message is actually logged
+    logger.debug("found %d good starts", len(good_starts))
+    if logger.isEnabledFor(logging.DEBUG):
+        for s in good_starts:
+            logger.debug("%s", s)
 
     return good_starts
 
-def find_stops(split_lines, good_starts, stop_lat, stop_long):
+def find_stops(activity, good_starts, stop_lat, stop_long):
     """
-    returns a list of stops matched to each start
-    :param split_lines: original activity lines
-    :param good_starts: list of starts
+    returns a list of stops matched to each start, with items: [<distance-from-stop(m)> <line-index> <data-line-index>]
+    :param activity: original activity columns
+    :param good_starts: list of starts, in line order (as returned by find_starts)
     :param stop_lat: stop's latitude
     :param stop_long: stop's longitude
     :return: a list of stops
     """
 
+    # the starts split the activity into intervals, so each interval's lines are searched exactly once
+    # line index of every start, followed by the end of the lines (the last start can go to the end, if necessary),
+    # so the lines for start t are bounds[t] + 1 up to, but not including, bounds[t + 1]
+    bounds = [s[1] for s in good_starts] + [len(activity)]
+
+    # distance (m) from the stop, calculated once instead of once per start
+    # lines before the first start are never searched, so they're only padded, keeping the line indices the same
+    first = min(bounds[0] + 1, len(activity))
+    stop_errors = [math.inf] * first + haversine_distances(activity.lat_rad[first:], activity.long_rad[first:],
+                                                           activity.cos_lat[first:], stop_lat, stop_long)
+
     # keep the first _stop_ after each start
     good_stops = []
 
     for t in range(len(good_starts)):
 
-        start_counter = good_starts[t][1]
-        best_stop_error = 1
-        best_stop_counter = 0
+        # only search the lines between this start and the next one
+        best_stop_counter, best_stop_error = find_closest(stop_errors, bounds[t] + 1, bounds[t + 1])
+
+        good_stops.append([best_stop_error, best_stop_counter, best_stop_counter])
+
+    logger.debug("found %d good stops", len(good_stops))
+    if logger.isEnabledFor(logging.DEBUG):
+        for s in good_stops:
+            logger.debug("%s", s)
+
+    return good_stops
+
+def haversine_distances(lat_rads, long_rads, cos_lats, lat0, long0):
+    """
+    returns the great-circle distance (m) from every lat/long position to a single lat/long position
+    :param lat_rads: latitudes (radians) to calculate distances for, e.g. activity.lat_rad
+    :param long_rads: longitudes (radians) to calculate distances for, e.g. activity.long_rad
+    :param cos_lats: cosines of lat_rads, e.g. activity.cos_lat
+    :param lat0: latitude (degrees) to calculate distances to
+    :param long0: longitude (degrees) to calculate distances to
+    :return: list of distances (m), in the same order as lat_rads and long_rads
+    """
 
-        if t < len(good_starts) - 1:
-            next_start_counter = good_starts[t + 1][1]
-        else:
-            # last start, so we can go to the end of the lines, if necessary
-            next_start_counter = len(split_lines)
+    # see: https://en.wikipedia.org/wiki/Haversine_formula
+    # look up the math functions once, instead of once per position
+    sin = math.sin; asin = math.asin; sqrt = math.sqrt
 
-        # assumes stops are sorted numerically, from first to last
-        for i in range(len(split_lines)):
+    lat0 = math.radians(lat0)
+    long0 = math.radians(long0)
+    cos_lat0 = math.cos(lat0)
+    diameter = 2 * EARTH_RADIUS
 
-            stop_counter = i
+    distances = []
 
-            if start_counter < stop_counter < next_start_counter:
+    for lat, long, cos_lat in zip(lat_rads, long_rads, cos_lats):
+        a = sin((lat - lat0) / 2) ** 2 + cos_lat * cos_lat0 * sin((long - long0) / 2) ** 2
+        distances.append(diameter * asin(sqrt(a)))
 
-                # print("DEBUG: testing after start...")
+    return distances
 
-                lat = split_lines[i][LAT]
-                long = split_lines[i][LONG]
+def load_hills_from_config(config_filename):
+    """
+    loads the list of hills from config/hills.ini into a dictionary indexed by the hill name
+    :param config_filename: name of the config .ini file
+    :return: dictionary of hills, each one an array of start lat, start long, stop lat, stop long
+    """
 
-                stop_lat_diff = (lat - stop_lat)
-                stop_long_diff = (long - stop_long)
-                stop_error = abs(stop_lat_diff) + abs(stop_long_diff)
+    config = cfg.ConfigParser()
 
-                if stop_error < best_stop_error:
-                    best_stop_counter = i
-                    best_stop_error = stop_error
-                    # print("DEBUG: best_stop_counter", best_stop_counter, "best_stop_error", best_stop_error)
+    # read() returns the files it could read, and silently skips any missing ones
+    if len(config.read(config_filename)) == 0:
+        logger.error("config file " + config_filename + " not found?")
+        exit(-1)
 
-        good_stops.append([best_stop_error, best_stop_counter, split_lines[best_stop_counter]])
+    if "hills" in config:
+        logger.info("hills found in config")
 
-    log_message("DEBUG: found good stops")
-    for s in good_stops:
-        log_message(s)
+        hills_dict = {}
+        for h in config["hills"]:
+            # parse the comma separated values straight into an array of floats, once per program start
+            hill_vals = array("d", map(num_str_to_float, config["hills"][h].split(",")))
 
-    return good_stops
+            if len(hill_vals) != 4:
+                logger.error("hill " + h + " needs 4 values: start lat, start long, stop lat, stop long")
+                exit(-1)
+
+            hills_dict[h] = hill_vals
+
+        return hills_dict
+    else:
+        logger.error("no hills found in config?")
+        exit(-1)
 
 def load_split_lines(filename):
     """
-    returns a list of activity lines, split by tab (\t) into predefined columns
+    returns the activity, with the lines split by tab (\t) into predefined columns
     :param filename: tab-delimited activity file
-    :return: list of list of lines
+    :return: Activity with one entry per line in every column
     """
     # verify activity file exists
     if not os.path.isfile(filename):
-        log_message("ERROR: activity file not found?")
+        logger.error("activity file not found?")
         exit(-1)
 
-    # source: https://stackoverflow.com/questions/14676265/how-to-read-a-text-file-into-a-list-or-an-array-with-python
-    f = open(filename, "r")
-    lines = f.read().splitlines()
-    f.close()
+    # number of numeric columns, lat to speed
+    num_values = SPEED - LAT + 1
+
+    times = []
+    # numeric values of every line, one after another: lat, long, alt, dist, HR, cadence, speed, lat, long, ...
+    values = array("d")
 
     # split the lines by delimiter
-    split_lines = []
+    # the file is streamed one line at a time, so the whole file is never held in memory as one string + list of lines
+    with open(filename, "r") as f:
 
-    for ln in lines:
+        for ln in f:
 
-        s = ln.split('\t')
+            s = ln.rstrip("\n").split("\t")
 
-        # drop the header line and any blank lines
-        if s[0] == "Time" or s[0] == "":
-            pass
-        else:
-            # convert lat/long to floats
-            # convert negative numbers from (xx.xx) to -xx.xx
-            c = [s[TIME],
-                 num_str_to_float(s[LAT]),
-                 num_str_to_float(s[LONG]),
-                 num_str_to_float(s[ALT]),
-                 num_str_to_float(s[DIST]),
-                 num_str_to_float(s[HR]),
-                 num_str_to_float(s[CAD]),
-                 num_str_to_float(s[SPEED])
-                 ]
-
-            split_lines.append(c)
-
-    return split_lines
-
-def log_message(msg):
-    print(msg)
+            # drop the header line and any blank lines
+            if s[0] == "Time" or s[0] == "":
+                pass
+            elif len(s) < SPEED + 1:
+                # a short line would shift every value after it into the wrong column
+                logger.error("activity line " + str(len(times) + 1) + " has " + str(len(s)) +
+                             " columns, expected " + str(SPEED + 1))
+                exit(-1)
+            else:
+                times.append(s[TIME])
+
+                # convert lat/long and the rest of the numeric columns to floats
+                # convert negative numbers from (xx.xx) to -xx.xx
+                values.extend(map(num_str_to_float, s[LAT:SPEED + 1]))
+
+    # split the values into columns, e.g. every 7th value, starting from the first, is a latitude
+    # extended slicing copies the values in C, without creating a Python float for every value
+    columns = [values[c - LAT::num_values] for c in range(LAT, SPEED + 1)]
+
+    return Activity(times, *columns)
 
 def num_str_to_float(num_str):
     """
@@ -239,6 +356,18 @@ def num_str_to_float(num_str):
     :return: float version of original numeric string
     """
 
+    # empty cells, e.g. no HR or cadence recorded, are about 1 in 14 values
+    if num_str == "" or num_str.isspace():
+        return 0.0
+
+    # about 3 in 4 values are already a plain number, e.g. " 49.2793093 ", and float() ignores the spaces
+    # negatives in parentheses and numbers with commas (about 1 in 6 values) go straight to the conversions below
+    if "(" not in num_str and "," not in num_str:
+        try:
+            return float(num_str)
+        except ValueError:
+            pass
+
     trimmed_num_str = num_str.strip()
 
     # convert (xx.xx) to -xx.xx
@@ -258,17 +387,17 @@ def num_str_to_float(num_str):
     try:
         num_float = float(trimmed_num_str)
     except:
-        log_message("ERROR: unable to convert num_str " + num_str + " to float type")
+        logger.error("unable to convert num_str " + num_str + " to float type")
         exit(-1)
 
     return num_float
 
-def save_interval_csv(activity_file, interval_id, split_lines, int_start, int_stop):
+def save_interval_csv(activity_file, interval_id, activity, int_start, int_stop):
     """
     saves the raw interval data to a CSV file
     :param activity_file: name of the original activity file
     :param interval_id: interval number
-    :param split_lines: original activity lines
+    :param activity: original activity columns
     :param int_start: starting index for this interval
     :param int_stop: stopping index for this interval
     :return: None
@@ -281,20 +410,21 @@ def save_interval_csv(activity_file, interval_id, split_lines, int_start, int_st
     # header
     f.write("Time,Latitude,Longitude,Alt.(M),Dist.(M),HR (Bpm),Cadence,Speed\n")
 
-    # +1 b/c range is up to, but not including
-    for x in range(int_start, int_stop + 1):
-        # remove the leading and trailing square brackets added when converting a list to a string
-        # remove the single quotes placed around times
-        line = str(split_lines[x]).replace("[", "").replace("]", "").replace("'", "")
-        f.write(line + "\n")
+    # +1 b/c slicing is up to, but not including
+    # slice every column, then zip the slices back together into lines
+    # only the original columns, to match the header
+    lines = zip(*(column[int_start:int_stop + 1] for column in activity.columns()[TIME:SPEED + 1]))
+
+    # join each line's values directly and write all of the lines at once
+    f.write("".join(", ".join(map(str, line)) + "\n" for line in lines))
 
     f.close()
 
-def save_summary_tab_txt(activity_file, split_lines, starts, stops):
+def save_summary_tab_txt(activity_file, activity, starts, stops):
     """
     save summary totals and calculations from all intervals as individual lines, with a header
     :param activity_file: name of the original activity file
-    :param split_lines: original lines from the activity file
+    :param activity: original columns from the activity file
     :param starts: list of interval starts
     :param stops: list of interval stops
     :return: None
@@ -304,43 +434,45 @@ def save_summary_tab_txt(activity_file, split_lines, starts, stops):
     # TODO: write to an 'intervals' or 'data' directory instead of the same dir that the activity is pulled from
     f = open(activity_file + "_summary" + ".txt", "w")
 
+    # collect all of the lines and write them at once, after the loop
+    rows = []
+
     # header
-    f.write("interval\t" +
-          "duration(mm:ss)\t" +
-          "duration(s)\t" +
-          "distance(m)\t" +
-          "minHR(BPM)\t" +
-          "avgHR(BPM)\t" +
-          "maxHR(BPM)\t" +
-          "minCad(RPM)\t" +
-          "avgCad(RPM)\t" +
-          "maxCad(RPM)\t" +
-          "minSpeed(m/s)\t" +
-          "avgSpeed(m/s)\t" +
-          "maxSpeed(m/s)\t" +
-          "minSpeed(km/h)\t" +
-          "avgSpeed(km/h)\t" +
-          "maxSpeed(km/h)\n"
-          )
+    rows.append("interval\t" +
+            "duration(mm:ss)\t" +
+            "duration(s)\t" +
+            "distance(m)\t" +
+            "minHR(BPM)\t" +
+            "avgHR(BPM)\t" +
+            "maxHR(BPM)\t" +
+            "minCad(RPM)\t" +
+            "avgCad(RPM)\t" +
+            "maxCad(RPM)\t" +
+            "minSpeed(m/s)\t" +
+            "avgSpeed(m/s)\t" +
+            "maxSpeed(m/s)\t" +
+            "minSpeed(km/h)\t" +
+            "avgSpeed(km/h)\t" +
+            "maxSpeed(km/h)\n"
+            )
 
     for i in range(len(starts)):
 
         # duration
-        time_stop = datetime.strptime(stops[i][2][TIME], date_format)
-        time_start = datetime.strptime(starts[i][2][TIME], date_format)
-        int_duration = time_stop - time_start
+        # NOTE: % wraps negative differences (past midnight) into a day
+        int_seconds = (time_str_to_seconds(activity.time[stops[i][2]]) -
+                       time_str_to_seconds(activity.time[starts[i][2]])) % (24 * 60 * 60)
+        int_duration = timedelta(seconds=int_seconds)
 
         # distance
-        int_dist = stops[i][2][DIST] - starts[i][2][DIST]
-
-        # calc heart rates
-        minHR, avgHR, maxHR = calc_column_min_avg_max(split_lines, HR, starts[i][1], stops[i][1])
+        int_dist = activity.dist[stops[i][2]] - activity.dist[starts[i][2]]
 
-        # calc cadence
-        minCad, avgCad, maxCad = calc_column_min_avg_max(split_lines, CAD, starts[i][1], stops[i][1])
-
-        # calc speed (m/s)
-        minSpeed, avgSpeed, maxSpeed = calc_column_min_avg_max(split_lines, SPEED, starts[i][1], stops[i][1])
+        # calc heart rates, cadence and speed (m/s) together
+        hr_stats, cad_stats, speed_stats = calc_columns_min_avg_max(activity, [HR, CAD, SPEED],
+                                                                    starts[i][1], stops[i][1])
+        minHR, avgHR, maxHR = hr_stats
+        minCad, avgCad, maxCad = cad_stats
+        minSpeed, avgSpeed, maxSpeed = speed_stats
 
         if minSpeed is None: minSpeed = 0
         if avgSpeed is None: avgSpeed = 0
@@ -351,36 +483,48 @@ def save_summary_tab_txt(activity_file, split_lines, starts, stops):
         avgSpeed_kmh = (avgSpeed * 3600) / 1000
         maxSpeed_kmh = (maxSpeed * 3600) / 1000
 
-        f.write("int " + str(i + 1) + "\t" +
-              str(int_duration) + "\t" +
-              str(int_duration.seconds) + "\t" +
-              str(int_dist) + "\t" +
-              str(minHR) + "\t" +
-              str(avgHR) + "\t" +
-              str(maxHR) + "\t" +
-              str(minCad) + "\t" +
-              str(avgCad) + "\t" +
-              str(maxCad) + "\t" +
-              str(minSpeed_kmh) + "\t" +
-              str(avgSpeed_kmh) + "\t" +
-              str(maxSpeed_kmh) + "\n"
-              )
+        rows.append(f"int {i + 1}\t{int_duration}\t{int_duration.seconds}\t{int_dist}\t"
+                    f"{minHR}\t{avgHR}\t{maxHR}\t"
+                    f"{minCad}\t{avgCad}\t{maxCad}\t"
+                    f"{minSpeed_kmh}\t{avgSpeed_kmh}\t{maxSpeed_kmh}\n")
+
+    f.writelines(rows)
 
     f.close()
 
+def time_str_to_seconds(time_str):
+    """
+    returns the number of seconds since midnight for an activity time, e.g. "7:51:08 PM" is 7*3600 + 51*60 + 8
+    :param time_str: time as string, formatted as date_format
+    :return: seconds (int)
+    """
+
+    # slice the hours, minutes and seconds out directly, strptime's format parsing is much slower
+    # NOTE: like %H in date_format, the AM/PM is ignored
+    hours, minutes, seconds = time_str.split()[0].split(":")
+
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
 def main():
 
+    # show log messages (info and up) on the console, same as print
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
     # check if we have at least N parameters from the command line
     if len(sys.argv) < 3:
         usage()
 
     #
     # hill coordinates (start latitude, start longitude, stop latitude, stop longitude)
-    # values are manually determined and added to the table below
+    # values are manually determined and added to the config file
+    # NOTE: configparser lower-cases the hill names
     #
-    hills = {
-        "ubc": [49.2793093, -123.2404815, 49.2713713, -123.2540545]
-    }
+    config_filename = "../config/hills.ini"
+    hills = load_hills_from_config(config_filename)
+
+    if len(hills) <= 0:
+        logger.error("no hills data available")
+        exit(-1)
 
     # TODO: replace hardcoded directories with config file entries
     intervals_output_dir = "../data/intervals/"
@@ -397,35 +541,36 @@ def main():
 
     # we just want the name, not any optional directory
     just_activity_filename = os.path.basename(activity_file)
-    log_message("DEBUG: just_activity_filename:" + just_activity_filename)
+    logger.info("just_activity_filename: " + just_activity_filename)
 
     # old cmdline interface, replaced with hill name (lower-case)
     #start_lat = float(sys.argv[2])
     #start_long = float(sys.argv[3])
     #stop_lat = float(sys.argv[4])
     #stop_long = float(sys.argv[5])
-    start_lat = hills[hill_name][0]
-    start_long = hills[hill_name][1]
-    stop_lat = hills[hill_name][2]
-    stop_long = hills[hill_name][3]
+    # configparser lower-cases the hill names, so e.g. UBC or ubc both work
+    if hill_name.lower() not in hills:
+        logger.error("hill " + hill_name + " not found in " + config_filename)
+        exit(-1)
+
+    start_lat, start_long, stop_lat, stop_long = hills[hill_name.lower()]
 
     #
     # load activity file and find intervals
     #
 
     # debug
-    print("DEBUG: loading", activity_file,
-          "starting at", start_lat, ",", start_long,
-          "stopping at", stop_lat, ",", stop_long)
+    logger.info("loading %s starting at %s , %s stopping at %s , %s",
+                activity_file, start_lat, start_long, stop_lat, stop_long)
 
     # load lines
-    split_lines = load_split_lines(activity_file)
+    activity = load_split_lines(activity_file)
 
     # find starts
-    starts = find_starts(split_lines, start_lat, start_long)
+    starts = find_starts(activity, start_lat, start_long)
 
     # find stops
-    stops = find_stops(split_lines, starts, stop_lat, stop_long)
+    stops = find_stops(activity, starts, stop_lat, stop_long)
 
     #
     # save interval files
@@ -433,12 +578,12 @@ def main():
     for i in range(len(starts)):
         int_start = starts[i][1]
         int_stop = stops[i][1]
-        save_interval_csv(intervals_output_dir + just_activity_filename, i, split_lines, int_start, int_stop)
+        save_interval_csv(intervals_output_dir + just_activity_filename, i, activity, int_start, int_stop)
 
     #
     # save summary file
     #
-    save_summary_tab_txt(summary_output_dir + just_activity_filename, split_lines, starts, stops)
+    save_summary_tab_txt(summary_output_dir + just_activity_filename, activity, starts, stops)
 
 
 if __name__ == "__main__":
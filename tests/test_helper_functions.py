@@ -1,4 +1,9 @@
 import unittest     # see: https://docs.python.org/3/library/unittest.html
+import math
+import os.path
+import tempfile
+from datetime import datetime
+from array import array
 import src.HillRepeats as hr
 
 # test the helper functions
@@ -11,6 +16,39 @@ class TestHillRepeats(unittest.TestCase):
             # this should print an error msg that the activity file was not found
             self.assertTrue(hr.load_split_lines(""))
 
+    def write_activity_file(self, lines):
+        # tab-delimited activity file with a header, removed when the test finishes
+        f = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        self.addCleanup(os.remove, f.name)
+        f.write("Time\t LatitudeDegrees \t LongitudeDegrees \t AltitudeMeters \t DistanceMeters \t"
+                "HeartRateBpm\tCadence\t Speed \n")
+        f.write("\n".join(lines) + "\n")
+        f.close()
+        return f.name
+
+    def test_load_split_lines_columns(self):
+        filename = self.write_activity_file(["7:37:44 PM\t 49.1 \t (123.1)\t 44.20 \t 4.710 \t75\t68\t 4.718 ",
+                                             "",
+                                             "7:37:47 PM\t 49.2 \t (123.2)\t 44.30 \t 19.590 \t78\t71\t - "])
+        activity = hr.load_split_lines(filename)
+
+        self.assertEqual(activity.time, ["7:37:44 PM", "7:37:47 PM"])
+        self.assertEqual(list(activity.lat), [49.1, 49.2])
+        self.assertEqual(list(activity.long), [-123.1, -123.2])
+        self.assertEqual(list(activity.alt), [44.2, 44.3])
+        self.assertEqual(list(activity.dist), [4.71, 19.59])
+        self.assertEqual(list(activity.hr), [75.0, 78.0])
+        self.assertEqual(list(activity.cad), [68.0, 71.0])
+        self.assertEqual(list(activity.speed), [4.718, 0.0])
+
+    def test_load_split_lines_short_line(self):
+        # ensure system exits instead of shifting values into the wrong columns
+        filename = self.write_activity_file(["7:37:44 PM\t1\t2\t3\t4\t5\t6\t7",
+                                             "7:37:45 PM\t1\t2\t3",
+                                             "7:37:46 PM\t15\t2\t3\t4\t5\t6\t7"])
+        with self.assertRaises(SystemExit):
+            hr.load_split_lines(filename)
+
     def test_num_str_to_float_parentheses_negative(self):
         self.assertEqual(hr.num_str_to_float("(123.456)"), float("-123.456"))
         self.assertEqual(hr.num_str_to_float(" (123.456)"), float("-123.456"))
@@ -28,6 +66,70 @@ class TestHillRepeats(unittest.TestCase):
         self.assertEqual(hr.num_str_to_float("1,000.00"), float(1000.00))
         self.assertEqual(hr.num_str_to_float("(1,000.99)"), float(-1000.99))
 
+    def test_find_starts_keeps_closest_20_in_line_order(self):
+        # 60 stopped lines near the start, 3 minutes apart, in a shuffled distance order, plus one line to start from
+        num_lines = 61
+        distance_rank = [(i * 37) % 60 for i in range(num_lines - 1)] + [0]
+        seconds = [i * 180 for i in range(num_lines)]
+
+        # the 20 closest, in line order
+        closest = [i for i in range(num_lines - 1) if distance_rank[i] < 20]
+
+        # move the second closest start to within 2 minutes of the first, so only the later of the two is kept
+        seconds[closest[1]] = seconds[closest[0]] + 60
+
+        activity = hr.Activity(time=["%d:%02d:%02d PM" % (s // 3600, s // 60 % 60, s % 60) for s in seconds],
+                               lat=array("d", [49.0 + rank * 0.000001 for rank in distance_rank]),
+                               long=array("d", [-123.0] * num_lines),
+                               speed=array("d", [0.0] * (num_lines - 1) + [5.0]))
+
+        starts = hr.find_starts(activity, 49.0, -123.0)
+
+        self.assertEqual([s[1] for s in starts], closest[1:])
+        # the start's data comes from the line after the zero-speed line
+        self.assertEqual([s[2] for s in starts], [i + 1 for i in closest[1:]])
+
+    def test_haversine_distances(self):
+        # one degree of latitude along a meridian is 1/360th of the earth's circumference
+        activity = hr.Activity(lat=array("d", [49.0, 50.0]), long=array("d", [-123.0, -123.0]))
+        distances = hr.haversine_distances(activity.lat_rad, activity.long_rad, activity.cos_lat, 49.0, -123.0)
+        self.assertEqual(distances[0], 0.0)
+        self.assertAlmostEqual(distances[1], 2 * math.pi * hr.EARTH_RADIUS / 360)
+
+    def test_calc_columns_min_avg_max(self):
+        activity = hr.Activity(time=["7:51:08 PM", "7:51:09 PM", "7:51:10 PM"],
+                               hr=array("d", [120.0, 130.0, 140.0]),
+                               cad=array("d", [0.0, 60.0, 80.0]),
+                               speed=array("d", [0.0, 2.5, 3.5]))
+        hr_stats, cad_stats, speed_stats = hr.calc_columns_min_avg_max(activity, [hr.HR, hr.CAD, hr.SPEED], 0, 2)
+        self.assertEqual((hr_stats[0], hr_stats[2]), (120.0, 140.0))
+        # min ignores zero (non-effort) values
+        self.assertEqual((cad_stats[0], cad_stats[2]), (60.0, 80.0))
+        self.assertEqual((speed_stats[0], speed_stats[2]), (2.5, 3.5))
+
+    def test_find_closest_first_of_ties(self):
+        distances = [0.0, 5.0, 2.0, 2.0, 9.0]
+        self.assertEqual(hr.find_closest(distances, 1, 5), (2, 2.0))
+        self.assertEqual(hr.find_closest(distances, 3, 3), (0, math.inf))
+
+    def test_load_hills_from_config(self):
+        hills = hr.load_hills_from_config(os.path.join(os.path.dirname(__file__), "..", "config", "hills.ini"))
+        # hill names are lower-cased by configparser
+        self.assertEqual(list(hills["ubc"]), [49.2793093, -123.2404815, 49.2713713, -123.2540545])
+
+    def test_load_hills_from_config_missing_file(self):
+        # ensure system exits with a missing config file
+        with self.assertRaises(SystemExit):
+            hr.load_hills_from_config("")
+
+    def test_time_str_to_seconds(self):
+        self.assertEqual(hr.time_str_to_seconds("0:00:00 AM"), 0)
+        self.assertEqual(hr.time_str_to_seconds("7:51:08 PM"), 7 * 3600 + 51 * 60 + 8)
+        # same as strptime with date_format, which ignores AM/PM
+        for time_str in ["7:51:08 PM", "12:00:00 AM", "23:59:59 PM"]:
+            parsed = datetime.strptime(time_str, hr.date_format)
+            self.assertEqual(hr.time_str_to_seconds(time_str), parsed.hour * 3600 + parsed.minute * 60 + parsed.second)
+
 # self contained
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file